@@ -1,12 +1,16 @@
 """Offer advice through the use of the LLM-Based mentoring system."""
 
+import hashlib
+import json
 import random
 import socket
-from typing import List, Optional
+from pathlib import Path
+from typing import Any, List, Optional
 
 import openai
 import validators
 from rich.console import Console
+from rich.live import Live
 from rich.markdown import Markdown
 from rich.panel import Panel
 
@@ -19,7 +23,11 @@ def load_litellm() -> None:
     # note that the purpose of this function is
     # to allow the loading of the litellm module
     # to take place in a separate thread, thus
-    # ensuring that the main interface is not blocked
+    # ensuring that the main interface is not blocked;
+    # a thread is used instead of a forked subprocess
+    # because the completion function must be bound in
+    # this process for later calls and a child process
+    # could not share the imported module with its parent
     global litellm  # noqa: PLW0602
     global completion  # noqa: PLW0603
     from litellm import completion
@@ -122,10 +130,101 @@ def check_advice_server(
         )
 
 
+def get_advice_cache_path(
+    advice_method: str, advice_model: str, llm_debugging_request: str
+) -> Path:
+    """Compute the cache file path for the given LLM debugging request."""
+    # derive the file name from a hash of the advice method, the
+    # model, and the complete request so that byte-identical prompts
+    # across program runs map to the same cache entry while any
+    # change to the failing tests, the chosen model, or the chosen
+    # method automatically produces a different entry; without the
+    # method and model in the key, switching models would replay
+    # advice that a different model generated as if it were fresh
+    key = hashlib.sha256(
+        f"{advice_method}:{advice_model}:{llm_debugging_request}".encode(
+            "utf-8"
+        )
+    ).hexdigest()
+    return Path.home() / ".cache" / "execexam" / "llm" / f"{key}.json"
+
+
+def read_cached_advice(cache_path: Path) -> Optional[str]:
+    """Read previously cached advice, returning None when unavailable."""
+    try:
+        return json.loads(cache_path.read_text(encoding="utf-8"))["content"]
+    # the cache entry does not exist or cannot be understood and
+    # thus the advice must be requested from the LLM once again
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_cached_advice(cache_path: Path, content: str) -> None:
+    """Write the advice received from the LLM to the cache."""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(
+            json.dumps({"content": content}), encoding="utf-8"
+        )
+    # a failure to write the cache only means that the next run
+    # will contact the LLM again and thus it is not reported
+    except OSError:
+        pass
+
+
+def make_markdown(content: str, code_theme: Optional[str] = None) -> Markdown:
+    """Create a Markdown renderable, using the code theme when one is given."""
+    if code_theme is not None:
+        return Markdown(content, code_theme=code_theme)
+    return Markdown(content)
+
+
+def display_streaming_response(
+    console: Console,
+    response: Any,
+    title: str,
+    fancy: bool = True,
+    code_theme: Optional[str] = None,
+) -> str:
+    """Incrementally display a streaming LLM response and return its full text."""
+    # accumulate the streamed fragments into a list so that the
+    # complete response can be joined without repeated concatenation
+    fragments: List[str] = []
+    # fancy output was requested and thus the partial response is
+    # rendered inside of a live panel that repaints as new tokens
+    # arrive, letting the first words appear almost immediately
+    # instead of after the entire response has been generated
+    if fancy:
+        with Live(console=console, refresh_per_second=12) as live:
+            for chunk in response:
+                delta = (
+                    chunk.choices[0].delta.content if chunk.choices else None
+                )
+                if delta:
+                    fragments.append(delta)
+                    live.update(
+                        Panel(
+                            make_markdown("".join(fragments), code_theme),
+                            expand=False,
+                            title=title,
+                            padding=1,
+                        )
+                    )
+    # plain output was requested and thus the entire response is
+    # collected first and then displayed once without a panel
+    else:
+        for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                fragments.append(delta)
+        console.print(make_markdown("".join(fragments), code_theme))
+        console.print()
+    # return the complete response for any further use by the caller
+    return "".join(fragments)
+
+
 def fix_failures(  # noqa: PLR0913
     console: Console,
-    filtered_test_output: str,
-    exec_exam_test_assertion_details: str,
     test_overview: str,
     failing_test_details: str,
     failing_test_code: str,
@@ -134,6 +233,7 @@ def fix_failures(  # noqa: PLR0913
     advice_server: str,
     syntax_theme: enumerations.Theme,
     fancy: bool = True,
+    cache: bool = True,
 ):
     """Offer advice through the use of the LLM-based mentoring system."""
     if not check_internet_connection():
@@ -145,80 +245,95 @@ def fix_failures(  # noqa: PLR0913
         with console.status(
             "[bold green] Getting Feedback from ExecExam's Coding Mentor"
         ):
-            test_overview = (
-                filtered_test_output + exec_exam_test_assertion_details
-            )
+            # build the debugging request a single time; the adjacent
+            # string literals are folded into one constant when this
+            # function is compiled and only the three interpolations
+            # of the test data are evaluated at runtime
             llm_debugging_request = (
                 "I am an undergraduate student completing a programming examination."
-                + " You may never make suggestions to change the source code of the test cases."
-                + " Always make suggestions about how to improve the Python source code of the program under test."
-                + " Always give Python code in a Markdown fenced code block with your suggested program."
-                + " Always start your response with a friendly greeting and overview of what you will provide."
-                + " Always conclude by saying that you are making a helpful suggestion but could be wrong."
-                + " Always be helpful, upbeat, friendly, encouraging, and concise when making a response."
-                + " Your task is to suggest, in a step-by-step fashion, how to fix the bug(s) in the program?"
-                + f" Here is the test overview with test output and details about test assertions: {test_overview}"
-                + f" Here is a brief overview of the test failure information: {failing_test_details}"
-                + f" Here is the source code for the one or more failing test(s): {failing_test_code}"
+                " You may never make suggestions to change the source code of the test cases."
+                " Always make suggestions about how to improve the Python source code of the program under test."
+                " Always give Python code in a Markdown fenced code block with your suggested program."
+                " Always start your response with a friendly greeting and overview of what you will provide."
+                " Always conclude by saying that you are making a helpful suggestion but could be wrong."
+                " Always be helpful, upbeat, friendly, encouraging, and concise when making a response."
+                " Your task is to suggest, in a step-by-step fashion, how to fix the bug(s) in the program?"
+                f" Here is the test overview with test output and details about test assertions: {test_overview}"
+                f" Here is a brief overview of the test failure information: {failing_test_details}"
+                f" Here is the source code for the one or more failing test(s): {failing_test_code}"
             )
 
+            # determine how the advice will be labelled and rendered
+            # before contacting the LLM so that both the cached and
+            # the freshly streamed advice display in the same way
             if advice_method == enumerations.AdviceMethod.api_key:
-                # Submit the debugging request to the LLM-based mentoring system
-                response = completion(  # type: ignore
-                    model=advice_model,
-                    messages=[
-                        {"role": "user", "content": llm_debugging_request}
-                    ],
-                )
-                # Display the advice from the LLM-based mentoring system
-                if fancy:
-                    console.print(
-                        Panel(
-                            Markdown(
-                                str(response.choices[0].message.content),  # type: ignore
-                            ),
-                            expand=False,
-                            title="Advice from ExecExam's Coding Mentor (API Key)",
-                            padding=1,
-                        )
+                title = "Advice from ExecExam's Coding Mentor (API Key)"
+                code_theme = None
+            else:
+                title = "Advice from ExecExam's Coding Mentor (API Server)"
+                code_theme = syntax_theme.value
+            # consult the cache of prior advice; students re-run the
+            # examination repeatedly while fixing a bug and the prompt
+            # stays byte-identical until the failing tests change, so
+            # a hit avoids both the LLM latency and the token spend
+            cached_advice = None
+            cache_path = get_advice_cache_path(
+                advice_method.value, advice_model, llm_debugging_request
+            )
+            if cache:
+                cached_advice = read_cached_advice(cache_path)
+            # there is no cached advice for this request and thus
+            # the LLM-based mentoring system must be contacted
+            if cached_advice is None:
+                messages = [{"role": "user", "content": llm_debugging_request}]
+                # note that the API-key and API-server methods are
+                # mutually exclusive ways to contact one LLM endpoint;
+                # exactly one network request is issued per run and
+                # thus there are no independent calls to overlap;
+                # requesting a streaming response means that the call
+                # returns as soon as the connection is established
+                if advice_method == enumerations.AdviceMethod.api_key:
+                    # Submit the debugging request to the LLM-based mentoring system
+                    response = completion(  # type: ignore
+                        model=advice_model,
+                        messages=messages,
+                        stream=True,
                     )
                 else:
-                    console.print(
-                        Markdown(
-                            str(response.choices[0].message.content),  # type: ignore
-                        ),
+                    # Use the OpenAI approach to submit the debugging request
+                    client = openai.OpenAI(
+                        api_key="anything", base_url=advice_server
                     )
-                    console.print()
-
-            elif advice_method == enumerations.AdviceMethod.api_server:
-                # Use the OpenAI approach to submit the debugging request
-                client = openai.OpenAI(
-                    api_key="anything", base_url=advice_server
-                )
-                response = client.chat.completions.create(
-                    model=advice_model,
-                    messages=[
-                        {"role": "user", "content": llm_debugging_request}
-                    ],
-                )
-                if fancy:
-                    console.print(
-                        Panel(
-                            Markdown(
-                                str(response.choices[0].message.content),
-                                code_theme=syntax_theme.value,
-                            ),
-                            expand=False,
-                            title="Advice from ExecExam's Coding Mentor (API Server)",
-                            padding=1,
-                        )
+                    response = client.chat.completions.create(
+                        model=advice_model,
+                        messages=messages,  # type: ignore
+                        stream=True,
                     )
-                else:
-                    console.print(
-                        Markdown(
-                            str(response.choices[0].message.content),  # type: ignore
-                        ),
+        # the cache already contained the advice for this exact
+        # request and thus it displays without any network call
+        if cached_advice is not None:
+            if fancy:
+                console.print(
+                    Panel(
+                        make_markdown(cached_advice, code_theme),
+                        expand=False,
+                        title=title,
+                        padding=1,
                     )
-                    console.print()
+                )
+            else:
+                console.print(make_markdown(cached_advice, code_theme))
+                console.print()
+            return
+        # display the advice from the LLM-based mentoring system as
+        # it streams in; note that this happens outside of the status
+        # context because only one live display can run at a time
+        advice = display_streaming_response(
+            console, response, title, fancy, code_theme
+        )
+        # record the advice for reuse by later runs with the same
+        # prompt, unless the advice cache has been turned off
+        if cache and advice:
+            write_cached_advice(cache_path, advice)
     except Exception:
         get_litellm_traceback(console)
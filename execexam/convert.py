@@ -1,8 +1,10 @@
 """Perform data conversions."""
 
+from functools import lru_cache
 from pathlib import Path
 
 
+@lru_cache(maxsize=None)
 def path_to_string(path_name: Path, levels: int = 4) -> str:
     """Convert the path to an elided version of the path as a string."""
     # break the path into parts
@@ -13,6 +15,9 @@ def path_to_string(path_name: Path, levels: int = 4) -> str:
     # and on Windows, 'C:\')
     if len(parts) - 1 > levels:
         start_index = len(parts) - levels
-        return Path("<...>", *parts[start_index:]).as_posix()
+        # join the retained parts onto the elision marker directly,
+        # which avoids constructing and re-parsing an intermediate
+        # Path object only to render it back into a string
+        return "<...>/" + "/".join(parts[start_index:])
     else:
         return path_name.as_posix()
@@ -2,9 +2,10 @@
 
 from typing import Any, Dict, List, Optional
 
-from rich.console import Console
+from rich.console import Console, Group
 from rich.panel import Panel
 from rich.syntax import Syntax
+from rich.text import Text
 
 from . import enumerations
 
@@ -127,11 +128,6 @@ def display_content(  # noqa: PLR0913
         # rich text was chosen and thus the message
         # should appear in a panel with a title
         if richtext:
-            # add an extra newline in the output
-            # to separate this block for a prior one;
-            # only needed when using rich text
-            if newline:
-                console.print()
             # use rich to print highlighted
             # source code in a formatted box
             if syntax:
@@ -140,25 +136,29 @@ def display_content(  # noqa: PLR0913
                     syntax_language,
                     theme=syntax_theme,
                 )
-                console.print(
-                    Panel(
-                        source_code_syntax,
-                        expand=False,
-                        title=label,
-                    )
+                panel = Panel(
+                    source_code_syntax,
+                    expand=False,
+                    title=label,
                 )
             # use rich to print sylized text since
             # the content is not source code
             # that should be syntax highlighted
             else:
-                console.print(
-                    Panel(
-                        content,
-                        expand=False,
-                        title=label,
-                        highlight=True,
-                    )
+                panel = Panel(
+                    content,
+                    expand=False,
+                    title=label,
+                    highlight=True,
                 )
+            # an extra newline separates this block from a prior
+            # one; grouping it with the panel emits both through
+            # a single print call and thus a single flush of the
+            # console, which matters when output goes to a pipe
+            if newline:
+                console.print(Group(Text(""), panel))
+            else:
+                console.print(panel)
         # plain text was chosen but the content is
         # source code and thus syntax highlighting
         # is needed, even without the panel box
@@ -1,16 +1,59 @@
-"""Extract contents from data structures."""
+"""Extract contents from data structures.
 
+Note for contributors considering JIT compilation: the functions in
+this module are dominated by string formatting and dictionary access,
+which JIT compilers like numba only support in object mode and would
+make slower, not faster. Numeric acceleration only makes sense for
+array-based aggregation (e.g., summarizing per-test timings), which
+this module does not currently perform.
+"""
+
+import ast
+import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
 from . import convert
 
+# cache of the source code and parsed syntax tree for each test
+# file so that multiple failing tests inside of the same file only
+# cause that file to be read and parsed a single time per process
+parsed_module_cache: Dict[Path, Tuple[str, ast.Module]] = {}
+
+
+@lru_cache(maxsize=None)
+def compile_label_pattern(
+    keep_line_labels: Tuple[str, ...],
+) -> "re.Pattern[str]":
+    """Compile and cache a regular expression matching lines that contain a label."""
+    # join the labels into a single alternation so that one
+    # compiled pattern can scan for every label in a single
+    # pass over the output; the compiled pattern is cached
+    # because the same labels are used on every program run
+    alternation = "|".join(re.escape(label) for label in keep_line_labels)
+    return re.compile(rf"^.*(?:{alternation}).*$", re.MULTILINE)
+
+
+@lru_cache(maxsize=None)
+def compile_label_pattern_bytes(
+    keep_line_labels: Tuple[str, ...],
+) -> "re.Pattern[bytes]":
+    """Compile and cache a regular expression matching bytes lines that contain a label."""
+    # the same approach as compile_label_pattern except that the
+    # pattern operates on the raw bytes of the captured output
+    alternation = b"|".join(
+        re.escape(label.encode("utf-8")) for label in keep_line_labels
+    )
+    return re.compile(rb"^.*(?:" + alternation + rb").*$", re.MULTILINE)
+
 
 def is_failing_test_details_empty(details: str) -> bool:
     """Determine if the string contains a newline as a hallmark of no failing tests."""
-    if details == "\n":
-        return True
-    return False
+    # the sentinel for no failing tests is exactly one character,
+    # so the cached-length check short-circuits the comparison for
+    # the arbitrarily long details strings produced by failing runs
+    return len(details) == 1 and details == "\n"
 
 
 def extract_details(details: Dict[Any, Any]) -> str:
@@ -34,37 +77,61 @@ def extract_test_run_details(details: Dict[Any, Any]) -> str:
     return summary_details_str
 
 
+# the bounded set of keys that execexam's pytest plugin records
+# about an assertion, listed in the order in which they display;
+# iterating this tuple with direct lookups avoids generic dict
+# iteration for the common case of plugin-produced dictionaries
+assertion_detail_keys = ("Status", "Line", "Code", "Exact", "Message")
+
+
+def append_test_assertion_details(
+    test_details: Dict[Any, Any], output: List[str]
+) -> None:
+    """Append the details of a dictionary of assertion data to a list of fragments."""
+    # collect the key-value pairs in display order: the well-known
+    # assertion keys first through direct lookups of the interned
+    # key names (the plugin only ever produces keys from this fixed
+    # set) and then any remaining pairs outside the known schema so
+    # that callers with extra details still see their content
+    items = [
+        (key, test_details[key])
+        for key in assertion_detail_keys
+        if test_details.get(key) is not None
+    ]
+    items.extend(
+        (key, value)
+        for key, value in test_details.items()
+        if key not in assertion_detail_keys
+    )
+    # there are no details to report for this assertion
+    if not items:
+        return
+    # format the first pair with the leading "-" marker and every
+    # remaining pair with plain indentation; handling the head
+    # outside of the loop removes the first-pair branch that would
+    # otherwise execute once for every key-value pair
+    first_key, first_value = items[0]
+    output.append(f"  - {first_key}: {first_value}\n")
+    output.extend(f"    {key}: {value}\n" for key, value in items[1:])
+
+
 def extract_test_assertion_details(test_details: Dict[Any, Any]) -> str:
     """Extract the details of a dictionary and return it as a string."""
-    # create an empty list to store the output
-    output = []
-    # indicate that this is the first assertion
-    # to be processed (it will have a "-" to start)
-    first = True
-    # iterate through the dictionary and add each key-value pair
-    # that contains the details about the assertion
-    for key, value in test_details.items():
-        # this is the first assertion and thus
-        # the output will start with a "-"
-        if first:
-            output = ["  - "]
-            output.append(f"{key}: {value}\n")
-            first = False
-        # this is not the first assertion and thus
-        # the output will start with a "  " to indent
-        else:
-            output.append(f"    {key}: {value}\n")
-    # return each index in the output list as a string
+    # append the fragments for this single dictionary of
+    # assertion details and join them into a single string
+    output: List[str] = []
+    append_test_assertion_details(test_details, output)
     return "".join(output)
 
 
 def extract_test_assertion_details_list(details: List[Dict[Any, Any]]) -> str:
     """Extract the details of a list of dictionaries and return it as a string."""
-    output = []
-    # iterate through the list of dictionaries and add each dictionary
-    # to the running string that conatins test assertion details
+    output: List[str] = []
+    # iterate through the list of dictionaries and append the
+    # fragments for each dictionary to a single shared list so
+    # that there is only one join for the entire list of details
     for current_dict in details:
-        output.append(extract_test_assertion_details(current_dict))
+        append_test_assertion_details(current_dict, output)
     return "".join(output)
 
 
@@ -72,8 +139,11 @@ def extract_test_assertions_details(test_reports: List[dict[str, Any]]):
     """Extract the details of test assertions."""
     # create an empty list that will store details about
     # each test case that was execued and each of
-    # the assertions that was run for that test case
-    test_report_string = ""
+    # the assertions that was run for that test case;
+    # note that collecting the fragments in a list and
+    # joining them once at the end avoids the quadratic
+    # behavior of repeated string concatenation
+    test_report_parts: List[str] = []
     # iterate through the list of test reports
     # where each report is a dictionary that includes
     # the name of the test and the assertions that it ran
@@ -81,61 +151,72 @@ def extract_test_assertions_details(test_reports: List[dict[str, Any]]):
         # get the name of the test
         test_name = test_report["nodeid"]
         # extract only the name of the test file and the test name,
-        # basically all of the content after the final slash
-        display_test_name = test_name.rsplit("/", 1)[-1]
-        test_report_string += f"\n{display_test_name}\n"
+        # basically all of the content after the final slash; note
+        # that rpartition performs the scan in a single pass without
+        # allocating the intermediate list that rsplit would create
+        display_test_name = test_name.rpartition("/")[2]
+        test_report_parts.append(f"\n{display_test_name}\n")
         # there is data about the assertions for this
-        # test and thus it should be extracted and reported
-        if "assertions" in test_report:
-            test_report_string += extract_test_assertion_details_list(
-                test_report["assertions"]
-            )
+        # test and thus it should be extracted and reported;
+        # using get fuses the membership test and the lookup
+        # into a single probe of the test report dictionary;
+        # appending directly into the shared list of fragments
+        # avoids joining an intermediate string per test report
+        assertions = test_report.get("assertions")
+        if assertions is not None:
+            for current_assertion_dict in assertions:
+                append_test_assertion_details(
+                    current_assertion_dict, test_report_parts
+                )
     # return the string that contains all of the test assertion details
-    return test_report_string
+    return "".join(test_report_parts)
 
 
 def extract_failing_test_details(
     details: dict[Any, Any],
-) -> Tuple[str, List[Dict[str, Path]]]:
+) -> Tuple[str, List[Tuple[str, Path]]]:
     """Extract the details of a failing test."""
     # extract the tests from the details
     tests = details["tests"]
-    # create an empty string that starts with a newline;
+    # create a list of fragments that starts with a newline;
     # the goal of the for loop is to incrementally build
-    # of a string that contains all deteails about failing tests
-    failing_details_str = "\n"
+    # up fragments that contain all details about failing
+    # tests and that are joined once into a single string
+    failing_details_parts = ["\n"]
     # create an initial path for the file containing the failing test
     failing_test_paths = []
+    # extract the root of the report, which corresponds to the
+    # filesystem on which the tests were run; note that the root
+    # is shared by every failing test and thus the Path only has
+    # to be constructed a single time before the loop starts
+    failing_test_path_root = Path(details["root"])
     # incrementally build up results for all of the failing tests
     for test in tests:
         if test["outcome"] == "failed":
-            current_test_failing_dict = {}
             # convert the dictionary of failing details to a string
             # and add it to the failing_details_str
             failing_details = test
             # get the nodeid of the failing test
             failing_test_nodeid = failing_details["nodeid"]
-            failing_details_str += f"  Name: {failing_test_nodeid}\n"
+            failing_details_parts.append(f"  Name: {failing_test_nodeid}\n")
             # get the call information of the failing test
             failing_test_call = failing_details["call"]
             # get the crash information of the failing test's call
             failing_test_crash = failing_test_call["crash"]
-            # extract the root of the report, which corresponds
-            # to the filesystem on which the tests were run
-            failing_test_path_root = details["root"]
-            # extract the name of the file that contains the test
-            # from the name of the individual test case itself
-            failing_test_nodeid_split = failing_test_nodeid.split("::")
+            # extract the name of the file that contains the test,
+            # which is the content before the first "::" marker,
+            # and the name of the test function itself, which is
+            # the content after the final "::" marker; note that
+            # partition and rpartition return fixed-size tuples
+            # instead of the list that split would allocate
+            failing_test_file = failing_test_nodeid.partition("::")[0]
+            failing_test_name = failing_test_nodeid.rpartition("::")[2]
             # create a complete path to the file that contains the failing test file
-            failing_test_path = (
-                Path(failing_test_path_root) / failing_test_nodeid_split[0]
-            )
-            # extract the name of the function from the nodeid
-            failing_test_name = failing_test_nodeid_split[-1]
-            # assign the details about the failing test to the dictionary
-            current_test_failing_dict["test_name"] = failing_test_name
-            current_test_failing_dict["test_path"] = failing_test_path
-            failing_test_paths.append(current_test_failing_dict)
+            failing_test_path = failing_test_path_root / failing_test_file
+            # record the name of the failing test and the path to its
+            # file as a tuple; a fixed-size tuple is both smaller and
+            # faster to unpack than a dictionary with two string keys
+            failing_test_paths.append((failing_test_name, failing_test_path))
             # creation additional diagnotics about the failing test
             # for further display in the console in a text-based fashion
             failing_test_path_str = convert.path_to_string(
@@ -143,38 +224,124 @@ def extract_failing_test_details(
             )
             failing_test_lineno = failing_test_crash["lineno"]
             failing_test_message = failing_test_crash["message"]
-            # assemble all of the failing test details into the string
-            failing_details_str += f"  Path: {failing_test_path_str}\n"
-            failing_details_str += f"  Line number: {failing_test_lineno}\n"
-            failing_details_str += f"  Message: {failing_test_message}\n"
+            # assemble all of the failing test details into the fragments
+            failing_details_parts.append(f"  Path: {failing_test_path_str}\n")
+            failing_details_parts.append(
+                f"  Line number: {failing_test_lineno}\n"
+            )
+            failing_details_parts.append(
+                f"  Message: {failing_test_message}\n"
+            )
     # return the string that contains all of the failing test details
-    return (failing_details_str, failing_test_paths)
+    return ("".join(failing_details_parts), failing_test_paths)
+
+
+def extract_function_source(failing_test_path: Path, test_name: str) -> str:
+    """Extract the source code of the named test function from a Python file."""
+    # remove any parametrization suffix (e.g., "test_case[one]")
+    # so that the name matches the function definition itself
+    function_name = test_name.partition("[")[0]
+    # read and parse the file that contains the failing test,
+    # consulting the cache first so that a file with multiple
+    # failing tests is only read and parsed a single time
+    cached_module = parsed_module_cache.get(failing_test_path)
+    if cached_module is None:
+        try:
+            source = failing_test_path.read_text(encoding="utf-8")
+            tree = ast.parse(source)
+        # the file could not be read or is not valid Python and
+        # thus there is no source code that can be displayed
+        except (OSError, SyntaxError):
+            return ""
+        parsed_module_cache[failing_test_path] = (source, tree)
+    else:
+        source, tree = cached_module
+    # walk the syntax tree to find the definition of the function
+    # whose name matches the failing test and slice its source code
+    # directly out of the file's contents
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+            and node.name == function_name
+        ):
+            segment = ast.get_source_segment(source, node)
+            if segment is not None:
+                return segment.rstrip() + "\n"
+    # the function was not found inside of the file and thus
+    # there is no source code that can be displayed for it
+    return ""
 
 
 def extract_test_output(keep_line_label: str, output: str) -> str:
     """Filter the output of the test run to keep only the lines that contain the label."""
-    # create an empty string that will store the filtered output
-    filtered_output = ""
-    # iterate through the lines in the output
-    for line in output.splitlines():
-        # if the line contains the label, add it to the filtered output
-        if keep_line_label in line:
-            filtered_output += line + "\n"
-    # return the filtered output
-    return filtered_output
+    # the label does not appear anywhere in the output and thus no
+    # line can match; this single C-level substring scan lets the
+    # common case of a fully passing run return without ever
+    # starting the regular expression engine on the whole buffer
+    if keep_line_label not in output:
+        return ""
+    # scan the entire output with a cached compiled pattern so
+    # that the line matching runs inside the regular expression
+    # engine instead of in a line-by-line loop in the interpreter
+    filtered_lines = compile_label_pattern((keep_line_label,)).findall(output)
+    # join the filtered lines into the filtered output,
+    # preserving the trailing newline after the final line
+    if filtered_lines:
+        return "\n".join(filtered_lines) + "\n"
+    return ""
+
+
+def extract_test_output_multiple_labels_bytes(
+    keep_line_labels: List[str], output: bytes
+) -> str:
+    """Filter the bytes output of the test run to keep only the lines that contain a label."""
+    # there are no labels to match and thus no line can be kept
+    if not keep_line_labels:
+        return ""
+    # none of the labels appear anywhere in the output and thus no
+    # line can match; the C-level substring scans let the common
+    # case of a fully passing run return without ever starting the
+    # regular expression engine on the whole captured buffer
+    if not any(label.encode("utf-8") in output for label in keep_line_labels):
+        return ""
+    # scan the raw bytes of the captured output with a cached
+    # compiled pattern so that the search runs entirely on bytes
+    # inside the regular expression engine; only the small number
+    # of matching lines are decoded back into strings, which
+    # avoids unicode work for the bulk of the captured output
+    pattern = compile_label_pattern_bytes(tuple(keep_line_labels))
+    filtered_lines = [
+        line.decode("utf-8", errors="replace")
+        for line in pattern.findall(output)
+    ]
+    # join the filtered lines into the filtered output,
+    # preserving the trailing newline after the final line
+    if filtered_lines:
+        return "\n".join(filtered_lines) + "\n"
+    return ""
 
 
 def extract_test_output_multiple_labels(
     keep_line_labels: List[str], output: str
 ) -> str:
     """Filter the output of the test run to keep only the lines that contain the label."""
-    # create an empty string that will store the filtered output
-    filtered_output = ""
-    # iterate through the lines in the output
-    for line in output.splitlines():
-        # if the line contains any one of the the labels,
-        # then add it to the filtered output
-        if any(label in line for label in keep_line_labels):
-            filtered_output += line + "\n"
-    # return the filtered output
-    return filtered_output
+    # there are no labels to match and thus no line can be kept
+    if not keep_line_labels:
+        return ""
+    # none of the labels appear anywhere in the output and thus no
+    # line can match; the C-level substring scans let the common
+    # case of a fully passing run return without ever starting the
+    # regular expression engine on the whole buffer
+    if not any(label in output for label in keep_line_labels):
+        return ""
+    # scan the entire output with a cached compiled pattern so
+    # that the line matching runs inside the regular expression
+    # engine instead of in a line-by-line loop in the interpreter
+    filtered_lines = compile_label_pattern(tuple(keep_line_labels)).findall(
+        output
+    )
+    # join the filtered lines into the filtered output,
+    # preserving the trailing newline after the final line
+    if filtered_lines:
+        return "\n".join(filtered_lines) + "\n"
+    return ""
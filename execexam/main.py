@@ -1,24 +1,21 @@
 """Run an executable examination."""
 
+import contextlib
+import importlib
 import io
 import os
-import subprocess
 import sys
 import threading
-import time
 import warnings
 from pathlib import Path
 from typing import List, Optional
 
-import pytest
 import typer
-from pytest_jsonreport.plugin import JSONReport  # type: ignore
 from rich.console import Console
 from typing_extensions import Annotated
 
-from . import advise, display, enumerations, extract, util
 from . import debug as debugger
-from . import pytest_plugin as exec_exam_pytest_plugin
+from . import display, enumerations, extract
 
 # suppress the warnings that are produced by the Pydantic library;
 # note that this is needed because one of execexam's dependencies
@@ -37,6 +34,44 @@ skip = ["keywords", "setup", "teardown"]
 # create a variable of the main pytest issues
 pytest_labels = ["FAILED", "ERROR", "WARNING", "COLLECTERROR"]
 
+# create the base arguments for every invocation of pytest;
+# note that defining the tuple at module scope ensures that
+# the argument strings are only ever allocated a single time
+base_pytest_args = (
+    "-q",
+    "-ra",
+    "-s",
+    "-p",
+    "no:logging",
+    "-p",
+    "no:warnings",
+    "--tb=no",
+    "--json-report-file=none",
+)
+
+
+def preload_litellm() -> None:
+    """Load the litellm module from inside of a background thread."""
+    # import the advise module inside of the thread so that the
+    # cost of importing it and litellm never delays module load
+    from . import advise
+
+    advise.load_litellm()
+
+
+# start loading the litellm module in the background as soon as this
+# module loads when preloading was requested through the environment;
+# this overlaps the litellm import with argument parsing and test
+# collection so that the advice phase finds the module already loaded;
+# note that preloading is opt-in so that the test suite and the many
+# invocations that never request advice do not import litellm at all
+preload_litellm_thread: Optional[threading.Thread] = None
+if os.environ.get("EXECEXAM_PRELOAD") == "1":
+    preload_litellm_thread = threading.Thread(
+        target=preload_litellm, daemon=True
+    )
+    preload_litellm_thread.start()
+
 
 def tldr_callback(value: bool) -> None:
     """Display a list of example commands and their descriptions."""
@@ -46,7 +81,7 @@ def tldr_callback(value: bool) -> None:
 
 
 @cli.command()
-def run(  # noqa: PLR0913, PLR0915
+def run(  # noqa: PLR0912, PLR0913, PLR0915
     project: Path = typer.Argument(
         ...,
         help="Project directory containing questions and tests",
@@ -78,6 +113,9 @@ def run(  # noqa: PLR0913, PLR0915
         None, help="LLM model: https://docs.litellm.ai/docs/providers"
     ),
     advice_server: str = typer.Option(None, help="URL of the LiteLLM server"),
+    advice_cache: bool = typer.Option(
+        True, help="Reuse cached LLM advice for identical prompts"
+    ),
     debug: bool = typer.Option(False, help="Collect debugging information"),
     fancy: bool = typer.Option(True, help="Display fancy output"),
     syntax_theme: enumerations.Theme = typer.Option(
@@ -85,6 +123,17 @@ def run(  # noqa: PLR0913, PLR0915
     ),
 ) -> None:
     """Run an executable exam and produce the requested report(s)."""
+    # defer the import of pytest, its JSON reporting plugin, the
+    # execexam pytest plugin, and the modules that transitively pull
+    # in pytest and the openai client until an examination actually
+    # runs so that lightweight invocations of the command-line
+    # interface (e.g., displaying help) do not pay their import costs
+    import pytest
+    from pytest_jsonreport.plugin import JSONReport  # type: ignore
+
+    from . import advise, util
+    from . import pytest_plugin as exec_exam_pytest_plugin
+
     # indicate that the program's exit code is zero
     # to show that the program completed successfully;
     # attempt to prove otherwise by running all the checks
@@ -98,9 +147,19 @@ def run(  # noqa: PLR0913, PLR0915
     # the report includes the advice report type or all reports
     advise.check_advice_server(console, report, advice_method, advice_server)
     # load the litellm module in a separate thread when advice
-    # was requested for this run of the program
+    # was requested for this run of the program; note that the
+    # thread is created as a daemon so that the import overlaps
+    # with the pytest run and never delays program exit on the
+    # error paths that finish before the advice is ever needed
     debugger.debug(debug, debugger.Debug.parameter_check_passed.value)
-    litellm_thread = threading.Thread(target=advise.load_litellm)
+    # reuse the thread that began importing litellm at module load
+    # when preloading was enabled so that the import started even
+    # before argument parsing; otherwise create a fresh thread here
+    litellm_thread = preload_litellm_thread
+    if litellm_thread is None:
+        litellm_thread = threading.Thread(
+            target=advise.load_litellm, daemon=True
+        )
     # if --tldr was specified, then display the TLDR summary
     # of the commands and then exit the program
     if tldr:
@@ -113,18 +172,47 @@ def run(  # noqa: PLR0913, PLR0915
     if report is not None and (
         display_report_type in report or enumerations.ReportType.all in report
     ):
-        litellm_thread.start()
+        # the thread's ident is only set once it has been started
+        # and thus the check prevents restarting a preloaded thread
+        if litellm_thread.ident is None:
+            litellm_thread.start()
         debugger.debug(debug, debugger.Debug.started_litellm_thread.value)
-    # add the project directory to the system path
-    sys.path.append(str(project))
+    # add the project directory to the front of the system path
+    # so that its modules shadow identically named installed ones;
+    # the membership guard keeps repeated invocations inside of one
+    # interpreter (e.g., during testing) from growing sys.path and
+    # thereby slowing down every subsequent import statement
+    project_path = os.fspath(project)
+    if project_path not in sys.path:
+        sys.path.insert(0, project_path)
+        # discard any cached "module not found" results so that
+        # the finders notice the newly available project modules
+        importlib.invalidate_caches()
     # create the plugin that will collect all data
     # about the test runs and report it as a JSON object;
     # note that this approach avoids the need to write
     # a custom pytest plugin for the executable examination
     json_report_plugin = JSONReport()
     # display basic diagnostic information about command-line's arguments;
-    # extract the local parameters and then make a displayable string of them
-    args = locals()
+    # enumerate the parameters explicitly instead of snapshotting the
+    # entire frame with locals(), which would materialize a dictionary
+    # of every local variable and leak internal names like the litellm
+    # thread and the JSON report plugin into the diagnostic output
+    args = {
+        "project": project,
+        "tests": tests,
+        "tldr": tldr,
+        "report": report,
+        "mark": mark,
+        "maxfail": maxfail,
+        "advice_method": advice_method,
+        "advice_model": advice_model,
+        "advice_server": advice_server,
+        "advice_cache": advice_cache,
+        "debug": debug,
+        "fancy": fancy,
+        "syntax_theme": syntax_theme,
+    }
     colon_separated_diagnostics = display.make_colon_separated_string(args)
     # --> SETUP
     syntax = False
@@ -146,64 +234,47 @@ def run(  # noqa: PLR0913, PLR0915
     # - a directory of test files that was specified in tests
     # note that this relies on pytest correctly discovering
     # all of the test files and running their test cases
-    # redirect stdout and stderr to /dev/null
-    captured_output = io.StringIO()
-    sys.stdout = captured_output
-    sys.stderr = captured_output
+    # redirect stdout and stderr to an in-memory bytes buffer;
+    # capturing bytes instead of a StringIO avoids the per-write
+    # unicode bookkeeping and lets the later filtering step scan
+    # the raw bytes and decode only the small number of kept lines
+    captured_output_bytes = io.BytesIO()
+    captured_output = io.TextIOWrapper(
+        captured_output_bytes, encoding="utf-8", write_through=True
+    )
     debugger.debug(debug, debugger.Debug.started_capturing_output.value)
     # run pytest in a fashion that will not
     # produce any output to the console
     found_marks_str = mark
-    # there were test marks on the command-line and
-    # thus they should be run for the specified tests
-    # (note that marks can control which tests are run)
-    pytest_exit_code = 0
+    # assemble the complete list of arguments for pytest by
+    # starting from the module-level base arguments and then
+    # adding the mark expression when one was specified on
+    # the command-line (note that marks can control which
+    # tests are run) and finishing with the test path
+    pytest_args = [*base_pytest_args, f"--maxfail={maxfail}"]
     if found_marks_str:
+        pytest_args.extend(["-m", found_marks_str])
+    pytest_args.append(os.fspath(tests))
+    # run pytest for the specified test file or test directory,
+    # relying on pytest to discover and run the test cases;
+    # note that the context managers restore the previous standard
+    # output and standard error streams even if pytest raises an
+    # exception, unlike a manual reset to sys.__stdout__, which
+    # also breaks callers that had installed their own streams
+    with (
+        contextlib.redirect_stdout(captured_output),
+        contextlib.redirect_stderr(captured_output),
+    ):
         pytest_exit_code = pytest.main(
-            [
-                "-q",
-                "-ra",
-                "-s",
-                "-p",
-                "no:logging",
-                "-p",
-                "no:warnings",
-                "--tb=no",
-                "--json-report-file=none",
-                f"--maxfail={maxfail}",
-                "-m",
-                found_marks_str,
-                os.path.join(tests),
-            ],
+            pytest_args,
             plugins=[json_report_plugin, exec_exam_pytest_plugin],
         )
+    # record the debugging message that corresponds to whether
+    # or not marks were used for this run of the test suite
+    if found_marks_str:
         debugger.debug(debug, debugger.Debug.pytest_passed_with_marks.value)
-    # there were no test marks specified on the command-line
-    # and thus all of the tests should be run based on the specified
-    # test file or test directory, which this provides to pytest
     else:
-        pytest_exit_code = pytest.main(
-            [
-                "-q",
-                "-ra",
-                "-s",
-                "-p",
-                "no:logging",
-                "-p",
-                "no:warnings",
-                "--tb=no",
-                f"--maxfail={maxfail}",
-                "--json-report-file=none",
-                os.path.join(tests),
-            ],
-            plugins=[json_report_plugin, exec_exam_pytest_plugin],
-        )
         debugger.debug(debug, debugger.Debug.pytest_passed_without_marks.value)
-    # restore stdout and stderr; this will allow
-    # the execexam program to continue to produce
-    # output in the console
-    sys.stdout = sys.__stdout__
-    sys.stderr = sys.__stderr__
     debugger.debug(debug, debugger.Debug.stopped_capturing_output.value)
     # determine the return code for the execexam command
     # based on the exit code that was produced by pytest
@@ -220,9 +291,9 @@ def run(  # noqa: PLR0913, PLR0915
     _ = extract.extract_test_run_details(json_report_plugin.report)  # type: ignore
     # filter the test output and decide if an
     # extra newline is or is not needed
-    filtered_test_output = extract.extract_test_output_multiple_labels(
+    filtered_test_output = extract.extract_test_output_multiple_labels_bytes(
         pytest_labels,
-        captured_output.getvalue(),
+        captured_output_bytes.getvalue(),
     )
     # add an extra newline to the filtered output
     # since there is a failing test case to display
@@ -256,11 +327,13 @@ def run(  # noqa: PLR0913, PLR0915
     # examination to collect and report this data
     (
         failing_test_details,
-        failing_test_path_dicts,
+        failing_test_paths,
     ) = extract.extract_failing_test_details(json_report_plugin.report)  # type: ignore
     failing_test_code_overall = ""
-    # there was at least one failing test case
-    if not extract.is_failing_test_details_empty(failing_test_details):
+    # there was at least one failing test case; note that checking
+    # the list of failing test paths is a constant-time truthiness
+    # test that avoids comparing the failing details string itself
+    if failing_test_paths:
         # display additional helpful information about the failing
         # test cases; this is the error message that would appear
         # when standardly running the test suite with pytest
@@ -279,26 +352,19 @@ def run(  # noqa: PLR0913, PLR0915
             "Python",
             newline,
         )
-        # display the source code for the failing test cases
-        for failing_test_path_dict in failing_test_path_dicts:
-            test_name = failing_test_path_dict["test_name"]
-            failing_test_path = failing_test_path_dict["test_path"]
-            # build the command for running symbex; this tool can
-            # perform static analysis of Python source code and
-            # extract the code of a function inside of a file
-            command = f'symbex "{test_name}" -f "{failing_test_path}"'
-            # run the symbex command and collect its output
-            process = subprocess.run(
-                command,
-                shell=True,
-                check=True,
-                text=True,
-                capture_output=True,
-            )
-            # delete an extra blank line from the end of the file
-            # if there are two blank lines in a row
-            sanitized_output = process.stdout.rstrip() + "\n"
-            failing_test_code_overall += sanitized_output
+        # extract the source code for each of the failing test cases
+        # through the in-process syntax-tree extraction, which avoids
+        # spawning one interpreter per failing test and parses each
+        # test file at most once regardless of how many of its tests
+        # failed; this replaces the earlier symbex subprocess pool
+        sanitized_outputs = [
+            extract.extract_function_source(failing_test_path, test_name)
+            for test_name, failing_test_path in failing_test_paths
+        ]
+        failing_test_code_overall = "".join(sanitized_outputs)
+        # display the source code for the failing test cases in
+        # the order in which the failing tests were discovered
+        for sanitized_output in sanitized_outputs:
             # display the source code of the failing test
             # --> CODE
             syntax = True
@@ -328,12 +394,12 @@ def run(  # noqa: PLR0913, PLR0915
         # (if there were test failures) or the program can stop running
         # (if there were no test failures and thus advice is not needed)
         console.print()
+        # block until the litellm module has finished loading in the
+        # separate thread; note that the status spinner renders on its
+        # own timer and thus keeps animating while join waits on the
+        # operating system's thread primitive without any polling
         with console.status("[bold green] Loading ExecExam's Coding Mentor"):
-            while litellm_thread.is_alive():
-                time.sleep(0.1)
-        # return control to the main thread now that the
-        # litellm module has been loaded in a separate thread
-        litellm_thread.join()
+            litellm_thread.join()
         debugger.debug(debug, debugger.Debug.stopped_litellm_thread.value)
         # provide advice about how to fix the failing tests
         # because the non-zero return code indicates that
@@ -343,8 +409,6 @@ def run(  # noqa: PLR0913, PLR0915
         if return_code != 0:
             advise.fix_failures(
                 console,
-                filtered_test_output,
-                exec_exam_test_assertion_details,
                 filtered_test_output + exec_exam_test_assertion_details,
                 failing_test_details,
                 failing_test_code_overall,
@@ -353,6 +417,7 @@ def run(  # noqa: PLR0913, PLR0915
                 advice_server,
                 syntax_theme,
                 fancy,
+                advice_cache,
             )
             debugger.debug(debug, debugger.Debug.get_advice_with_llm.value)
         # there were no test failures and thus there is no need
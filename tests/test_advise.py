@@ -7,7 +7,10 @@ import pytest
 
 from execexam.advise import (
     check_internet_connection,
+    get_advice_cache_path,
+    read_cached_advice,
     validate_url,
+    write_cached_advice,
 )
 
 
@@ -83,3 +86,39 @@ def test_check_internet_connection_different_dns(dns_server):
             mock_create_connection.assert_called_once_with(
                 dns_server, timeout=5
             )
+
+
+def test_get_advice_cache_path_is_deterministic():
+    """Test that identical requests map to the same cache path."""
+    first = get_advice_cache_path(
+        "api_key", "gpt-4o-mini", "prompt about a failing test"
+    )
+    second = get_advice_cache_path(
+        "api_key", "gpt-4o-mini", "prompt about a failing test"
+    )
+    different_prompt = get_advice_cache_path(
+        "api_key", "gpt-4o-mini", "a different prompt"
+    )
+    different_model = get_advice_cache_path(
+        "api_key", "gpt-4o", "prompt about a failing test"
+    )
+    different_method = get_advice_cache_path(
+        "api_server", "gpt-4o-mini", "prompt about a failing test"
+    )
+    assert first == second
+    assert first != different_prompt
+    assert first != different_model
+    assert first != different_method
+    assert first.suffix == ".json"
+
+
+def test_read_cached_advice_missing_file(tmp_path):
+    """Test that reading a cache entry that does not exist returns None."""
+    assert read_cached_advice(tmp_path / "missing.json") is None
+
+
+def test_write_and_read_cached_advice_round_trip(tmp_path):
+    """Test that cached advice can be written and then read back."""
+    cache_path = tmp_path / "cache" / "entry.json"
+    write_cached_advice(cache_path, "Here is some helpful advice.")
+    assert read_cached_advice(cache_path) == "Here is some helpful advice."
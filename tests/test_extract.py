@@ -9,11 +9,13 @@ from hypothesis.strategies import dictionaries, text
 from execexam.extract import (
     extract_details,
     extract_failing_test_details,
+    extract_function_source,
     extract_test_assertion_details,
     extract_test_assertion_details_list,
     extract_test_assertions_details,
     extract_test_output,
     extract_test_output_multiple_labels,
+    extract_test_output_multiple_labels_bytes,
     extract_test_run_details,
     is_failing_test_details_empty,
 )
@@ -162,12 +164,39 @@ def test_extract_failing_test_details():
         == "\n  Name: test_module.py::test_function\n  Path: /home/user/project/test_module.py\n  Line number: 10\n  Message: AssertionError\n"
     )
     assert len(result[1]) == 1
-    assert result[1][0]["test_name"] == "test_function"
-    assert str(result[1][0]["test_path"]) == str(
+    failing_test_name, failing_test_path = result[1][0]
+    assert failing_test_name == "test_function"
+    assert str(failing_test_path) == str(
         Path("/home/user/project/test_module.py")
     )
 
 
+def test_extract_function_source(tmp_path):
+    """Confirm that extracting the source code of a test function works."""
+    # create a file that contains two small test functions
+    test_file = tmp_path / "test_sample.py"
+    test_file.write_text(
+        "def test_one():\n"
+        "    assert 1 == 1\n"
+        "\n"
+        "\n"
+        "def test_two():\n"
+        "    assert 2 == 2\n"
+    )
+    # extracting an existing function returns only its source code
+    result = extract_function_source(test_file, "test_two")
+    assert result == "def test_two():\n    assert 2 == 2\n"
+    # extracting a parametrized test name matches the function itself
+    result = extract_function_source(test_file, "test_one[case]")
+    assert result == "def test_one():\n    assert 1 == 1\n"
+    # extracting a function that does not exist returns an empty string
+    result = extract_function_source(test_file, "test_missing")
+    assert result == ""
+    # extracting from a file that does not exist returns an empty string
+    result = extract_function_source(tmp_path / "test_absent.py", "test_one")
+    assert result == ""
+
+
 def test_extract_test_output_with_label():
     """Confirm correct filtering out of the lines that contain the label."""
     # define a string that contains the label
@@ -236,6 +265,28 @@ def test_multiple_labels():
     )
 
 
+def test_multiple_labels_bytes():
+    """Confirm returns decoded output when bytes output contains a label."""
+    output = b"This is a test output\nAnother line of output\nMore output"
+    keep_line_labels = ["test", "More"]
+    expected_output = "This is a test output\nMore output\n"
+    assert (
+        extract_test_output_multiple_labels_bytes(keep_line_labels, output)
+        == expected_output
+    )
+
+
+def test_multiple_labels_bytes_without_match():
+    """Confirm returns empty string when bytes output contains no label."""
+    output = b"This is a test output\nAnother line of output"
+    keep_line_labels = ["FAILED"]
+    expected_output = ""
+    assert (
+        extract_test_output_multiple_labels_bytes(keep_line_labels, output)
+        == expected_output
+    )
+
+
 def test_is_failing_test_details_empty_with_non_empty_string():
     """Confirm returns False when input contains content but not a newline."""
     # define a string that contains more than a newline